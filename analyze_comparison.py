@@ -2,46 +2,21 @@
 """
 Analyze the comparison between MATLAB and Python atmospheric transmission
 """
+import sys
 import numpy as np
 
-# Read Python results
-python_data = []
-with open('/home/dana/matlab_projects/python_results.txt', 'r') as f:
-    for line in f:
-        if line.strip() and not line.startswith('#') and ',' in line:
-            try:
-                parts = line.strip().split(',')
-                if len(parts) == 7:
-                    wvl = float(parts[0])
-                    trans_total = float(parts[1])
-                    if 300 <= wvl <= 1100:
-                        python_data.append([wvl, trans_total])
-            except:
-                pass
+from transmission_io import load_transmission_csv, band_means
 
-# Read MATLAB results
-matlab_data = []
-with open('/home/dana/matlab_projects/matlab_results.txt', 'r') as f:
-    for line in f:
-        if line.strip() and not line.startswith('#') and ',' in line:
-            try:
-                parts = line.strip().split(',')
-                if len(parts) == 7:
-                    wvl = float(parts[0])
-                    trans_total = float(parts[1])
-                    if 300 <= wvl <= 1100:
-                        matlab_data.append([wvl, trans_total])
-            except:
-                pass
-
-# Convert to arrays
-python_data = np.array(python_data)
-matlab_data = np.array(matlab_data)
+# Read Python and MATLAB results
+python_data = load_transmission_csv('/home/dana/matlab_projects/python_results.txt')
+matlab_data = load_transmission_csv('/home/dana/matlab_projects/matlab_results.txt')
 
 # Ensure same length
 min_len = min(len(python_data), len(matlab_data))
-python_data = python_data[:min_len]
-matlab_data = matlab_data[:min_len]
+# Kept in float64: float32 rounding (~6e-8 near 1) shifts differences across
+# the 1e-6 significance threshold used below
+python_data = np.asarray(python_data[:min_len], dtype=np.float64)
+matlab_data = np.asarray(matlab_data[:min_len], dtype=np.float64)
 
 print("=== MATLAB vs PYTHON COMPARISON ===\n")
 print(f"Number of wavelength points: {len(python_data)}")
@@ -50,7 +25,9 @@ print(f"Wavelength range: {python_data[0,0]:.0f} - {python_data[-1,0]:.0f} nm")
 # Calculate differences
 differences = matlab_data[:, 1] - python_data[:, 1]
 abs_diff = np.abs(differences)
-rel_diff = np.abs(differences / python_data[:, 1]) * 100  # percentage
+with np.errstate(divide='ignore', invalid='ignore'):
+    # percentage, zero where the Python transmission itself is zero
+    rel_diff = np.where(python_data[:, 1] != 0, abs_diff / np.abs(python_data[:, 1]) * 100.0, 0.0)
 
 print(f"\nTransmission differences:")
 print(f"  Mean absolute difference: {np.mean(abs_diff):.6f}")
@@ -67,18 +44,19 @@ print(f"  Difference: {differences[max_diff_idx]:.6f}")
 
 # Check if differences are significant
 threshold = 1e-6
-significant_diffs = abs_diff > threshold
+n_significant = int(np.count_nonzero(abs_diff > threshold))
 print(f"\nWavelengths with differences > {threshold}:")
-if np.any(significant_diffs):
-    sig_wvls = python_data[significant_diffs, 0]
-    sig_py = python_data[significant_diffs, 1]
-    sig_ml = matlab_data[significant_diffs, 1]
-    sig_diff = differences[significant_diffs]
-    
+if n_significant:
+    # Largest 10 differences, without sorting the full array
+    k = min(10, n_significant)
+    idx = np.argpartition(abs_diff, -k)[-k:]
+    idx = idx[np.argsort(-abs_diff[idx])]
+    rows = np.column_stack([python_data[idx, 0], python_data[idx, 1],
+                            matlab_data[idx, 1], differences[idx]])
+
     print("Wavelength(nm) | Python    | MATLAB    | Difference")
     print("---------------|-----------|-----------|------------")
-    for i in range(min(10, len(sig_wvls))):  # Show first 10
-        print(f"    {sig_wvls[i]:6.1f}    | {sig_py[i]:.6f} | {sig_ml[i]:.6f} | {sig_diff[i]:+.6f}")
+    np.savetxt(sys.stdout, rows, fmt='    %6.1f    | %.6f | %.6f | %+.6f')
 else:
     print("  None - Results are identical within numerical precision!")
 
@@ -98,14 +76,10 @@ bands = [
 print("\nBand-averaged transmissions:")
 print("Band     | Python  | MATLAB  | Diff")
 print("---------|---------|---------|--------")
-for band_name, wvl_min, wvl_max in bands:
-    mask_py = (python_data[:, 0] >= wvl_min) & (python_data[:, 0] <= wvl_max)
-    mask_ml = (matlab_data[:, 0] >= wvl_min) & (matlab_data[:, 0] <= wvl_max)
-    
-    mean_py = np.mean(python_data[mask_py, 1])
-    mean_ml = np.mean(matlab_data[mask_ml, 1])
+means_py = band_means(python_data[:, 0], python_data[:, 1], bands)
+means_ml = band_means(matlab_data[:, 0], matlab_data[:, 1], bands)
+for (band_name, _, _), mean_py, mean_ml in zip(bands, means_py, means_ml):
     diff = mean_ml - mean_py
-    
     print(f"{band_name:8s} | {mean_py:.4f} | {mean_ml:.4f} | {diff:+.6f}")
 
 print("\n=== CONCLUSION ===")
@@ -1,19 +1,26 @@
 #!/usr/bin/env python3
 """
 Compare Python and MATLAB atmospheric transmission implementations
+
+Usage:
+    python compare_matlab_python_transmission.py [--plot]
+
+    --plot  show the total transmission with matplotlib
 """
 import numpy as np
-import matplotlib.pyplot as plt
 import sys
 sys.path.append('/home/dana/anaconda3/envs/myenv/lib/python3.12/site-packages')
 
-from transmission_fitter.atmospheric_models import (
-    Rayleigh_Transmission, 
-    Ozone_Transmission,
-    WaterTransmittance,
-    Aerosol_Transmission,
-    UMGTransmittance
-)
+from transmission_io import band_means
+
+if '--help' in sys.argv or '-h' in sys.argv:
+    print(__doc__)
+    sys.exit(0)
+
+def _load_models():
+    """Import the transmission_fitter models only when they are needed"""
+    from transmission_fitter import atmospheric_models
+    return atmospheric_models
 
 # Standard test conditions matching MATLAB defaults
 z_ = 0.0           # Zenith angle (degrees)
@@ -38,47 +45,52 @@ print(f"  Water vapor: {pwv} cm")
 print(f"  Aerosol AOD: {tau_aod}")
 print(f"  CO2: {co2_ppm} ppm")
 
+def interp_components(target, sources):
+    """Interpolate (wvl_arr, trans) pairs onto target, sharing the grid search
+    between sources defined on the same wavelength array (same as np.interp)"""
+    out = np.empty((len(sources), len(target)))
+    grids = []  # (src_wvl, idx, weight) per distinct source grid
+    for i, (src, trans) in enumerate(sources):
+        for grid_src, idx, w in grids:
+            if grid_src is src or np.array_equal(grid_src, src):
+                break
+        else:
+            idx = np.clip(np.searchsorted(src, target) - 1, 0, len(src) - 2)
+            w = np.clip((target - src[idx]) / (src[idx + 1] - src[idx]), 0.0, 1.0)
+            grids.append((src, idx, w))
+        out[i] = trans[idx] * (1.0 - w) + trans[idx + 1] * w
+    return out
+
 # Calculate individual components
 print("\nCalculating components...")
 
-# Rayleigh
-ray = Rayleigh_Transmission(z_, p_)
-trans_ray = ray.make_transmission()
-trans_ray_interp = np.interp(wavelengths, ray.wvl_arr, trans_ray)
+# Rayleigh, ozone, water, aerosol and UMG (with trace gases)
+models = _load_models()
+ray = models.Rayleigh_Transmission(z_, p_)
+oz = models.Ozone_Transmission(z_, dobson)
+water = models.WaterTransmittance(z_, pwv, p_)
+aer = models.Aerosol_Transmission(z_, tau_aod, alpha)
+umg = models.UMGTransmittance(z_, tair, p_, co2_ppm, with_trace_gases=True)
 
-# Ozone
-oz = Ozone_Transmission(z_, dobson)
-trans_oz = oz.make_transmission()
-trans_oz_interp = np.interp(wavelengths, oz.wvl_arr, trans_oz)
+# Rows: Rayleigh, ozone, water, aerosol, UMG
+trans_components = interp_components(
+    wavelengths, [(model.wvl_arr, model.make_transmission())
+                  for model in (ray, oz, water, aer, umg)])
 
-# Water
-water = WaterTransmittance(z_, pwv, p_)
-trans_water = water.make_transmission()
-trans_water_interp = np.interp(wavelengths, water.wvl_arr, trans_water)
-
-# Aerosol
-aer = Aerosol_Transmission(z_, tau_aod, alpha)
-trans_aer = aer.make_transmission()
-trans_aer_interp = np.interp(wavelengths, aer.wvl_arr, trans_aer)
-
-# UMG with trace gases
-umg = UMGTransmittance(z_, tair, p_, co2_ppm, with_trace_gases=True)
-trans_umg = umg.make_transmission()
-trans_umg_interp = np.interp(wavelengths, umg.wvl_arr, trans_umg)
-
-# Total transmission
-trans_total = trans_ray_interp * trans_oz_interp * trans_water_interp * trans_aer_interp * trans_umg_interp
+# Total transmission - single product pass over the stacked components
+trans_total = np.prod(trans_components, axis=0)
 
 # Output results for comparison
-print("\n# Wavelength(nm), Trans_Total, Trans_Ray, Trans_Oz, Trans_Water, Trans_Aer, Trans_UMG")
-for i in range(len(wavelengths)):
-    print(f"{wavelengths[i]:.1f}, {trans_total[i]:.6f}, {trans_ray_interp[i]:.6f}, "
-          f"{trans_oz_interp[i]:.6f}, {trans_water_interp[i]:.6f}, "
-          f"{trans_aer_interp[i]:.6f}, {trans_umg_interp[i]:.6f}")
+print()
+np.savetxt(sys.stdout, np.column_stack([wavelengths, trans_total, trans_components.T]),
+           fmt='%.1f, %.6f, %.6f, %.6f, %.6f, %.6f, %.6f',
+           header='Wavelength(nm), Trans_Total, Trans_Ray, Trans_Oz, Trans_Water, Trans_Aer, Trans_UMG')
 
-plt.figure()
-plt.plot(wavelengths, trans_total);
-plt.show()
+if '--plot' in sys.argv:
+    import matplotlib.pyplot as plt
+    plt.figure()
+    plt.plot(wavelengths, trans_total)
+    plt.show()
 
 # Summary statistics
 print(f"\n=== SUMMARY ===")
@@ -87,10 +99,11 @@ print(f"Min total transmission: {np.min(trans_total):.4f}")
 print(f"Max total transmission: {np.max(trans_total):.4f}")
 
 # Band averages
-uv_mask = (wavelengths >= 300) & (wavelengths <= 400)
-vis_mask = (wavelengths >= 400) & (wavelengths <= 700)
-nir_mask = (wavelengths >= 700) & (wavelengths <= 1100)
-
-print(f"\nMean UV transmission (300-400 nm): {np.mean(trans_total[uv_mask]):.4f}")
-print(f"Mean visible transmission (400-700 nm): {np.mean(trans_total[vis_mask]):.4f}")
-print(f"Mean NIR transmission (700-1100 nm): {np.mean(trans_total[nir_mask]):.4f}")
\ No newline at end of file
+bands = [
+    ("UV", 300, 400),
+    ("visible", 400, 700),
+    ("NIR", 700, 1100)
+]
+print()
+for (band_name, wvl_min, wvl_max), mean_band in zip(bands, band_means(wavelengths, trans_total, bands)):
+    print(f"Mean {band_name} transmission ({wvl_min}-{wvl_max} nm): {mean_band:.4f}")
\ No newline at end of file
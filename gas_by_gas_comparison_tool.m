@@ -107,11 +107,11 @@ function run_full_comparison(python_data)
         
         % Get Python results
         python_field = [gas '_transmission'];
-        if ~isfield(python_data, python_field)
+        python_trans = get_python_transmission(python_data, python_field);
+        if isempty(python_trans)
             fprintf('%-6s | Missing Python data\n', gas);
             continue;
         end
-        python_trans = python_data.(python_field);
         
         % Calculate MATLAB results for this gas
         matlab_trans = calculate_single_gas_transmission(...
@@ -0,0 +1,14 @@
+function trans = get_python_transmission(python_data, python_field)
+    % Python transmission field from a python_*_results.mat structure.
+    % Input  : - python_data - structure loaded from the Python .mat file.
+    %          - python_field - field name, e.g. 'o2_transmission'.
+    % Output : - Transmission array, dequantized when the field was stored
+    %            as uint16 with the --quantize option; empty when missing.
+    if isfield(python_data, [python_field '_q'])
+        trans = double(python_data.([python_field '_q'])) * python_data.transmission_scale;
+    elseif isfield(python_data, python_field)
+        trans = python_data.(python_field);
+    else
+        trans = [];
+    end
+end
\ No newline at end of file
@@ -103,11 +103,11 @@ function run_full_comparison(python_data)
         % Get Python results
         python_field = sprintf('uo_%d_transmission', Uo);
         
-        if ~isfield(python_data, python_field)
+        python_trans = get_python_transmission(python_data, python_field);
+        if isempty(python_trans)
             fprintf('%-8d | Missing Python data\n', Uo);
             continue;
         end
-        python_trans = python_data.(python_field);
         
         % Calculate MATLAB results
         matlab_trans = transmission.atmospheric.ozoneTransmission(...
@@ -234,12 +234,11 @@ function analyze_ozone_differences(python_data, Uo_values, Lam, O3_data, Z_test)
         % Get Python results
         python_field = sprintf('uo_%d_transmission', Uo);
         
-        if ~isfield(python_data, python_field)
+        python_trans = get_python_transmission(python_data, python_field);
+        if isempty(python_trans)
             continue;
         end
         
-        python_trans = python_data.(python_field);
-        
         % Calculate MATLAB results
         matlab_trans = transmission.atmospheric.ozoneTransmission(...
             Z_test, Uo, Lam, 'O3Data', O3_data);
@@ -7,7 +7,11 @@ This script calculates individual gas transmittances using the original Python
 UMGTransmittance class and saves results for comparison with MATLAB implementation.
 
 Usage:
-    python python_gas_analysis.py
+    python python_gas_analysis.py [--quantize] [--per-gas]
+
+    --quantize  store transmissions as uint16 (resolution 1/65535) in the .mat file
+    --per-gas   build an independent model per gas (in parallel processes)
+                instead of slicing one batched UMG run
 
 Requirements:
     - transmission_fitter package installed
@@ -17,6 +21,7 @@ Requirements:
 import numpy as np
 import sys
 import os
+from concurrent.futures import ProcessPoolExecutor
 
 # Add the transmission_fitter package to path
 sys.path.insert(0, '/home/dana/anaconda3/envs/myenv/lib/python3.12/site-packages')
@@ -24,75 +29,133 @@ sys.path.insert(0, '/home/dana/anaconda3/envs/myenv/lib/python3.12/site-packages
 from transmission_fitter.atmospheric_models import UMGTransmittance, NLOSCHMIDT
 from transmission_fitter.abscalutils import make_wvl_array
 
+from transmission_io import njit, quantize_transmissions
+
+# Common wavelength grid of all transmission models
+WAVELENGTHS = make_wvl_array()
+
+# Gases handled by SingleGasUMG, with the absorption coefficient attribute
+# prefix and the SMARTS airmass constituent used for each
+UMG_GASES = ['O2', 'CH4', 'CO', 'N2O', 'CO2', 'N2', 'O4', 'NH3']
+GAS_CONSTITUENTS = {
+    'O2':  ('o2', 'o2'),
+    'CH4': ('ch4', 'ch4'),
+    'CO':  ('co', 'co'),
+    'N2O': ('n2o', 'n2o'),
+    'CO2': ('co2', 'co2'),
+    'N2':  ('n2', 'n2'),
+    'O4':  ('o4', 'o2'),
+    'NH3': ('nh3', 'nh3'),   # trace gas
+}
+
+@njit(cache=True, fastmath=True)
+def _gas_abundances(pp0, tt0, co2_ppm):
+    """Abundances of UMG_GASES (rows) for flat pressure/temperature ratio arrays"""
+    out = np.empty((8, pp0.size))
+    for i in range(pp0.size):
+        p = pp0[i]
+        lp = np.log(p)
+        out[0, i] = 1.67766e5 * p                                          # O2
+        out[1, i] = 1.3255 * (p ** 1.0574)                                 # CH4
+        out[2, i] = .29625 * (p**2.4480) * np.exp(.54669 - 2.4114 * p + .65756 * (p**2))  # CO
+        out[3, i] = .24730 * (p**1.0791)                                   # N2O
+        out[4, i] = 0.802685 * co2_ppm * p                                 # CO2
+        out[5, i] = 3.8269 * (p**1.8374)                                   # N2
+        out[6, i] = 1.8171e4 * (NLOSCHMIDT**2) * (p**1.7984) / (tt0[i]**.344)  # O4
+        out[7, i] = np.exp(- 8.6499 + 2.1947*lp - 2.5936*(lp**2)
+                           - 1.819*(lp**3) - 0.65854*(lp**4))              # NH3
+    return out
+
 class SingleGasUMG(UMGTransmittance):
     """Modified UMGTransmittance to test individual gases"""
     
     def __init__(self, z_, tair, p_, co2_ppm=415., with_trace_gases=True, target_gas='ALL'):
+        self._am_cache = {}
+        # Per-gas optical depths (G, sza, wvl), set by _optical_depth for 'ALL_BATCH'
+        self.gas_taug = None
         super().__init__(z_, tair, p_, co2_ppm, with_trace_gases)
         self.target_gas = target_gas
-        
+
+    def _airmass(self, sza, constituent):
+        """Airmass_from_SMARTS memoized per constituent and zenith angles"""
+        sza = np.asarray(sza)
+        key = (constituent, sza.shape, sza.tobytes())
+        am = self._am_cache.get(key)
+        if am is None:
+            am = self._am_cache[key] = self.Airmass_from_SMARTS(sza, constituent)
+        return am
+
+    def _gas_mask(self):
+        """Boolean mask over UMG_GASES contributing for the current target"""
+        if self.target_gas in ('ALL', 'ALL_BATCH'):
+            mask = np.ones(len(UMG_GASES), dtype=bool)
+        else:
+            mask = np.array([gas == self.target_gas for gas in UMG_GASES])
+        if not self.with_trace_gases:
+            mask[UMG_GASES.index('NH3')] = False
+        return mask
+
+    def _abundances(self, pp0, tt0):
+        """Column abundance of every gas in UMG_GASES"""
+        shape = np.shape(pp0)
+        pp = np.array(pp0, dtype=np.float64).ravel()
+        tt = np.array(np.broadcast_to(tt0, shape), dtype=np.float64).ravel()
+        values = _gas_abundances(pp, tt, float(self.co2_ppm))
+        return dict(zip(UMG_GASES, values.reshape((len(UMG_GASES),) + shape)))
+
+    def _gas_columns(self, pp0, sza, gas_mask):
+        """Absorption coefficients (G, wvl) and abundance * airmass (G, sza) for
+        UMG_GASES, with zero columns for gases outside gas_mask"""
+        tt0 = np.zeros_like(pp0) + (self.tair + 273.15) / 273.15
+        abundances = self._abundances(pp0, tt0)
+
+        # Absorption coefficients are only read for gases in gas_mask
+        absorption = np.zeros((len(UMG_GASES), len(self.wvl_arr)))
+        column = np.zeros((len(UMG_GASES), len(sza)))
+        for i in np.flatnonzero(gas_mask):
+            gas = UMG_GASES[i]
+            prefix, constituent = GAS_CONSTITUENTS[gas]
+            absorption[i] = getattr(self, f'{prefix}abs')
+            am = self._airmass(sza, constituent)
+            column[i] = np.broadcast_to(np.ravel(abundances[gas] * am), (len(sza),))
+        return absorption, column
+
+    def gas_optical_depths(self, pp0, sza, gas_mask):
+        """Per-gas optical depth stack (G, sza, wvl) over UMG_GASES"""
+        absorption, column = self._gas_columns(pp0, sza, gas_mask)
+        return column[:, :, None] * absorption[:, None, :]
+
     def _optical_depth(self, pp0, sza):
         """Modified optical depth calculation for single gas testing"""
-        
-        tt0 = np.zeros_like(pp0) + (self.tair + 273.15) / 273.15
-        taug_l = np.zeros((len(sza), len(self.wvl_arr)))
-
-        def getam(constituent):
-            return self.Airmass_from_SMARTS(sza, constituent)
-
-        def getabs(constituent):
-            return getattr(self, f'{constituent}abs')[None, :]
-
-        # Only calculate for target gas
-        if self.target_gas == 'O2' or self.target_gas == 'ALL':
-            # 1. Oxygen, O2
-            abundance = 1.67766e5 * pp0
-            taug_l += getabs('o2') * abundance * getam('o2')
-            
-        if self.target_gas == 'CH4' or self.target_gas == 'ALL':
-            # 2. Methane, CH4
-            abundance = 1.3255 * (pp0 ** 1.0574)
-            taug_l += getabs('ch4') * abundance * getam('ch4')
-            
-        if self.target_gas == 'CO' or self.target_gas == 'ALL':
-            # 3. Carbon Monoxide, CO
-            abundance = .29625 * (pp0**2.4480) * \
-                np.exp(.54669 - 2.4114 * pp0 + .65756 * (pp0**2))
-            taug_l += getabs('co') * abundance * getam('co')
-            
-        if self.target_gas == 'N2O' or self.target_gas == 'ALL':
-            # 4. Nitrous Oxide, N2O
-            abundance = .24730 * (pp0**1.0791)
-            taug_l += getabs('n2o') * abundance * getam('n2o')
-            
-        if self.target_gas == 'CO2' or self.target_gas == 'ALL':
-            # 5. Carbon Dioxide, CO2
-            abundance = 0.802685 * self.co2_ppm * pp0
-            taug_l += getabs('co2') * abundance * getam('co2')
-            
-        if self.target_gas == 'N2' or self.target_gas == 'ALL':
-            # 6. Nitrogen, N2
-            abundance = 3.8269 * (pp0**1.8374)
-            taug_l += getabs('n2') * abundance * getam('n2')
-            
-        if self.target_gas == 'O4' or self.target_gas == 'ALL':
-            # 7. Oxygen-Oxygen, O4
-            abundance = 1.8171e4 * (NLOSCHMIDT**2) * (pp0**1.7984) / (tt0**.344)
-            taug_l += getabs('o4') * abundance * getam('o2')
-
-        # Trace gases (if enabled)
-        if self.with_trace_gases:
-            if self.target_gas == 'NH3' or self.target_gas == 'ALL':
-                # 7. Ammonia, NH3
-                lpp0 = np.log(pp0)
-                abundance = np.exp(
-                    - 8.6499 + 2.1947*lpp0 - 2.5936*(lpp0**2)
-                    - 1.819*(lpp0**3) - 0.65854*(lpp0**4))
-                taug_l += getabs('nh3') * abundance * getam('nh3')
 
+        gas_mask = self._gas_mask()
+        if self.target_gas == 'ALL_BATCH':
+            # Keep every gas separately so one run serves the whole gas sweep
+            self.gas_taug = self.gas_optical_depths(pp0, sza, gas_mask)
+            return self.gas_taug.sum(axis=0)
+
+        # Sum over gases in one contraction instead of one (sza, wvl) update per gas
+        absorption, column = self._gas_columns(pp0, sza, gas_mask)
+        taug_l = np.einsum('gs,gw->sw', column, absorption)
         return taug_l
 
-def analyze_single_gas(gas_name, z_=30.0, tair=15.0, p_=1013.25, co2_ppm=415.0, verbose=True):
+def print_gas_summary(trans, wavelengths):
+    """Print range, mean and absorption points of a gas transmittance"""
+    min_idx = np.argmin(trans)
+    min_trans = trans[min_idx]
+    max_trans = np.max(trans)
+    mean_trans = np.mean(trans)
+
+    # Find absorption features
+    strong_absorption = np.sum(trans < 0.99)
+
+    print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
+    print(f"  Mean: {mean_trans:.6f}")
+    print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
+    print(f"  Absorption points (T<0.99): {strong_absorption}")
+
+def analyze_single_gas(gas_name, z_=30.0, tair=15.0, p_=1013.25, co2_ppm=415.0, verbose=True,
+                       wavelengths=WAVELENGTHS):
     """Analyze transmittance for a single gas"""
     
     if verbose:
@@ -105,23 +168,50 @@ def analyze_single_gas(gas_name, z_=30.0, tair=15.0, p_=1013.25, co2_ppm=415.0,
     trans = umg.make_transmission()
     
     if verbose:
-        # Analyze results
-        min_trans = np.min(trans)
-        max_trans = np.max(trans)
-        mean_trans = np.mean(trans)
-        
-        min_idx = np.argmin(trans)
-        wavelengths = umg.wvl_arr
-        
-        # Find absorption features
-        strong_absorption = np.sum(trans < 0.99)
-        
-        print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
-        print(f"  Mean: {mean_trans:.6f}")
-        print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
-        print(f"  Absorption points (T<0.99): {strong_absorption}")
+        print_gas_summary(trans, wavelengths)
     
-    return trans, umg.wvl_arr
+    return trans, wavelengths
+
+def analyze_all_gases(z_=30.0, tair=15.0, p_=1013.25, co2_ppm=415.0, verbose=True,
+                      wavelengths=WAVELENGTHS):
+    """Analyze transmittance of every gas in UMG_GASES from a single UMG run"""
+
+    umg = SingleGasUMG(z_, tair, p_, co2_ppm, with_trace_gases=True, target_gas='ALL_BATCH')
+    total = umg.make_transmission()
+    trans_shape = np.shape(total)
+
+    results = {gas: np.exp(-umg.gas_taug[i]).reshape(trans_shape)
+               for i, gas in enumerate(UMG_GASES)}
+
+    # The split assumes make_transmission is exp(-sum of gas optical depths)
+    if not np.allclose(np.prod(list(results.values()), axis=0), total):
+        print("⚠️  Per-gas split does not reproduce the UMG total, running each gas separately")
+        results = {gas: analyze_single_gas(gas, z_, tair, p_, co2_ppm, False, wavelengths)[0]
+                   for gas in UMG_GASES}
+
+    if verbose:
+        for gas in UMG_GASES:
+            print(f"\nAnalyzing {gas} transmittance...")
+            print_gas_summary(results[gas], wavelengths)
+
+    return results, wavelengths
+
+def analyze_gases_parallel(gases, z_=30.0, tair=15.0, p_=1013.25, co2_ppm=415.0, verbose=True,
+                           wavelengths=WAVELENGTHS):
+    """Analyze each gas with its own SingleGasUMG, one process per gas"""
+
+    with ProcessPoolExecutor(max_workers=len(gases)) as executor:
+        futures = {gas: executor.submit(analyze_single_gas, gas, z_, tair, p_, co2_ppm, False,
+                                        wavelengths)
+                   for gas in gases}
+        results = {gas: future.result()[0] for gas, future in futures.items()}
+
+    if verbose:
+        for gas in gases:
+            print(f"\nAnalyzing {gas} transmittance...")
+            print_gas_summary(results[gas], wavelengths)
+
+    return results, wavelengths
 
 def main():
     """Main analysis function"""
@@ -143,13 +233,13 @@ def main():
     print(f"  CO2: {co2_ppm:.0f} ppm")
     
     # Test each gas
-    gases = ['O2', 'CH4', 'CO', 'N2O', 'CO2', 'N2', 'O4', 'NH3']
-    results = {}
-    
-    for gas in gases:
-        trans, wavelengths = analyze_single_gas(
-            gas, z_test, tair_test, p_test, co2_ppm, verbose=True)
-        results[gas] = trans
+    gases = UMG_GASES
+    if '--per-gas' in sys.argv:
+        results, wavelengths = analyze_gases_parallel(
+            gases, z_test, tair_test, p_test, co2_ppm, verbose=True)
+    else:
+        results, wavelengths = analyze_all_gases(
+            z_test, tair_test, p_test, co2_ppm, verbose=True)
     
     # Save results for MATLAB comparison
     print(f"\nSaving results for MATLAB comparison...")
@@ -171,7 +261,10 @@ def main():
         for gas in gases:
             save_data[f'{gas}_transmission'] = results[gas]
         
-        savemat('python_gas_results.mat', save_data)
+        if '--quantize' in sys.argv:
+            save_data = quantize_transmissions(save_data)
+
+        savemat('python_gas_results.mat', save_data, do_compression=True)
         print("✅ Results saved to python_gas_results.mat")
         
     except ImportError:
@@ -7,7 +7,9 @@ This script calculates ozone transmittances using the original Python
 Ozone_Transmission class and saves results for comparison with MATLAB implementation.
 
 Usage:
-    python python_ozone_analysis.py
+    python python_ozone_analysis.py [--quantize]
+
+    --quantize  store transmissions as uint16 (resolution 1/65535) in the .mat file
 
 Requirements:
     - transmission_fitter package installed
@@ -24,7 +26,32 @@ sys.path.insert(0, '/home/dana/anaconda3/envs/myenv/lib/python3.12/site-packages
 from transmission_fitter.atmospheric_models import Ozone_Transmission
 from transmission_fitter.abscalutils import make_wvl_array
 
-def analyze_ozone_transmission(z_, uo_, verbose=True):
+from transmission_io import quantize_transmissions
+
+# Common wavelength grid of all transmission models
+WAVELENGTHS = make_wvl_array()
+
+def print_ozone_summary(trans, wavelengths):
+    """Print range, mean and absorption points of an ozone transmittance"""
+    min_trans = np.min(trans)
+    max_trans = np.max(trans)
+    mean_trans = np.mean(trans)
+    
+    min_idx = np.argmin(trans)
+    
+    # Find absorption characteristics
+    very_strong_abs = np.sum(trans < 0.01)   # Nearly opaque
+    strong_abs = np.sum(trans < 0.1)         # Strong absorption
+    moderate_abs = np.sum(trans < 0.5)       # Moderate absorption
+    weak_abs = np.sum(trans < 0.9)           # Weak absorption
+    
+    print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
+    print(f"  Mean: {mean_trans:.6f}")
+    print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
+    print(f"  Absorption points - Opaque: {very_strong_abs}, Strong: {strong_abs}, "
+          f"Moderate: {moderate_abs}, Weak: {weak_abs}")
+
+def analyze_ozone_transmission(z_, uo_, verbose=True, wavelengths=WAVELENGTHS):
     """Analyze ozone transmittance for given conditions"""
     
     if verbose:
@@ -37,27 +64,31 @@ def analyze_ozone_transmission(z_, uo_, verbose=True):
     trans = ozone_model.make_transmission()
     
     if verbose:
-        # Analyze results
-        min_trans = np.min(trans)
-        max_trans = np.max(trans)
-        mean_trans = np.mean(trans)
-        
-        min_idx = np.argmin(trans)
-        wavelengths = ozone_model.wvl_arr
-        
-        # Find absorption characteristics
-        very_strong_abs = np.sum(trans < 0.01)   # Nearly opaque
-        strong_abs = np.sum(trans < 0.1)         # Strong absorption
-        moderate_abs = np.sum(trans < 0.5)       # Moderate absorption
-        weak_abs = np.sum(trans < 0.9)           # Weak absorption
-        
-        print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
-        print(f"  Mean: {mean_trans:.6f}")
-        print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
-        print(f"  Absorption points - Opaque: {very_strong_abs}, Strong: {strong_abs}, "
-              f"Moderate: {moderate_abs}, Weak: {weak_abs}")
+        print_ozone_summary(trans, wavelengths)
     
-    return trans, ozone_model.wvl_arr
+    return trans, wavelengths
+
+def analyze_ozone_transmission_batch(z_, uo_values, verbose=True, wavelengths=WAVELENGTHS):
+    """Analyze ozone transmittance for several column amounts at once
+
+    Beer-Lambert gives T = exp(-σ * Uo * AM), so the optical depth of a single
+    analyze_ozone_transmission run is rescaled to every Uo.
+    Returns a (len(uo_values), n_wvl) array.
+    """
+    uo_arr = np.asarray(uo_values, dtype=np.float64)
+    
+    # Smallest column as reference, keeping its transmission away from underflow
+    uo_ref = np.min(uo_arr)
+    trans_ref, _ = analyze_ozone_transmission(z_, uo_ref, verbose=False, wavelengths=wavelengths)
+    tau_unit = -np.log(trans_ref) / uo_ref
+    trans = np.exp(-tau_unit[None, :] * uo_arr[:, None])
+    
+    if verbose:
+        for uo_, trans_uo in zip(uo_values, trans):
+            print(f"\nAnalyzing ozone transmission: Uo={uo_:.0f} DU, Z={z_:.1f}°")
+            print_ozone_summary(trans_uo, wavelengths)
+    
+    return trans, wavelengths
 
 def analyze_uv_absorption(wavelengths, transmission, uo_value):
     """Analyze UV ozone absorption characteristics"""
@@ -110,18 +141,12 @@ def main():
     print(f"  Ozone column amounts: {uo_values} DU")
     
     # Get wavelength info
-    wvl_arr = make_wvl_array()
-    print(f"  Wavelengths: {len(wvl_arr)} points [{np.min(wvl_arr):.0f}-{np.max(wvl_arr):.0f} nm]")
+    print(f"  Wavelengths: {len(WAVELENGTHS)} points "
+          f"[{np.min(WAVELENGTHS):.0f}-{np.max(WAVELENGTHS):.0f} nm]")
     
     # Test each ozone column amount
-    results = {}
-    wavelengths = None
-    
-    for uo in uo_values:
-        trans, wvl = analyze_ozone_transmission(z_test, uo, verbose=True)
-        results[uo] = trans
-        if wavelengths is None:
-            wavelengths = wvl
+    trans, wavelengths = analyze_ozone_transmission_batch(z_test, uo_values, verbose=True)
+    results = dict(zip(uo_values, trans))
     
     # Analyze UV absorption characteristics for a reference case
     uo_ref = 300  # DU (typical mid-latitude value)
@@ -137,13 +162,13 @@ def main():
     print("-" * 70)
     
     for uo in uo_values:
-        trans = results[uo]
-        min_val, max_val = np.min(trans), np.max(trans)
-        mean_val = np.mean(trans)
+        # One sort gives the range and all threshold counts without masks
+        trans = np.sort(results[uo])
+        min_val, max_val = trans[0], trans[-1]
+        mean_val = trans.mean()
         
-        very_strong_abs = np.sum(trans < 0.01)   # Nearly opaque
-        strong_abs = np.sum(trans < 0.1)         # Strong absorption
-        moderate_abs = np.sum(trans < 0.5)       # Moderate absorption
+        # Nearly opaque (<0.01), strong (<0.1) and moderate (<0.5) absorption
+        very_strong_abs, strong_abs, moderate_abs = np.searchsorted(trans, [0.01, 0.1, 0.5])
         
         print(f"{uo:<8.0f} | [{min_val:.6f},{max_val:.6f}] | {mean_val:<10.6f} | "
               f"{very_strong_abs:<8} | {strong_abs:<8} | {moderate_abs:<10}")
@@ -167,7 +192,10 @@ def main():
             field_name = f'uo_{uo}_transmission'
             save_data[field_name] = results[uo]
         
-        savemat('python_ozone_results.mat', save_data)
+        if '--quantize' in sys.argv:
+            save_data = quantize_transmissions(save_data)
+
+        savemat('python_ozone_results.mat', save_data, do_compression=True)
         print("✅ Results saved to python_ozone_results.mat")
         
     except ImportError:
@@ -17,12 +17,79 @@ Requirements:
 import numpy as np
 import sys
 import os
+from functools import lru_cache, wraps
 
 # Add the transmission_fitter package to path
 sys.path.insert(0, '/home/dana/anaconda3/envs/myenv/lib/python3.12/site-packages')
 
+from transmission_fitter import abscalutils, atmospheric_models
 from transmission_fitter.atmospheric_models import WaterTransmittance
-from transmission_fitter.abscalutils import make_wvl_array
+
+from transmission_io import njit
+
+def _memoize_wvl_array(make_wvl_array):
+    """Cache the wavelength grid per argument set; callers get a private copy"""
+    cached = lru_cache(maxsize=8)(make_wvl_array)
+    
+    @wraps(make_wvl_array)
+    def wrapper(*args, **kwargs):
+        try:
+            return cached(*args, **kwargs).copy()
+        except TypeError:
+            # Unhashable arguments (e.g. lists) cannot be cache keys
+            return make_wvl_array(*args, **kwargs)
+    return wrapper
+
+# Every WaterTransmittance rebuilds the same grid; patch the name in both modules,
+# atmospheric_models holds its own reference from a from-import
+make_wvl_array = _memoize_wvl_array(abscalutils.make_wvl_array)
+for _module in (abscalutils, atmospheric_models):
+    if hasattr(_module, 'make_wvl_array'):
+        _module.make_wvl_array = make_wvl_array
+
+# Transmission thresholds for nearly opaque, strong and moderate absorption;
+# float64 so that counts near a threshold match the MATLAB tool
+_ABS_THRESHOLDS = np.array([0.1, 0.5, 0.8])
+
+# Row of the water vapor summary table
+_SUMMARY_ROW = ("{pw:<8.1f} | [{min_val:.3f},{max_val:.3f}] | {mean_val:<10.6f} | "
+                "{opaque:<8} | {strong:<8} | {moderate:<10}")
+
+@njit(cache=True, fastmath=True)
+def _summarize(trans):
+    """Single pass over trans returning (min, max, mean, argmin, n<0.1, n<0.5, n<0.8)"""
+    opaque_thr = _ABS_THRESHOLDS[0]
+    strong_thr = _ABS_THRESHOLDS[1]
+    moderate_thr = _ABS_THRESHOLDS[2]
+    min_val = trans[0]
+    max_val = trans[0]
+    min_idx = 0
+    total = 0.0
+    n_opaque = 0
+    n_strong = 0
+    n_moderate = 0
+    for i in range(trans.size):
+        t = trans[i]
+        if t < min_val:
+            min_val = t
+            min_idx = i
+        if t > max_val:
+            max_val = t
+        total += t
+        n_opaque += t < opaque_thr
+        n_strong += t < strong_thr
+        n_moderate += t < moderate_thr
+    return min_val, max_val, total / trans.size, min_idx, n_opaque, n_strong, n_moderate
+
+def print_water_summary(stats, wavelengths):
+    """Print range, mean and absorption points from a _summarize() tuple"""
+    (min_trans, max_trans, mean_trans, min_idx,
+     very_strong_abs, strong_abs, moderate_abs) = stats
+    
+    print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
+    print(f"  Mean: {mean_trans:.6f}")
+    print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
+    print(f"  Absorption points - Opaque: {very_strong_abs}, Strong: {strong_abs}, Moderate: {moderate_abs}")
 
 def analyze_water_transmission(z_, pw_, p_, verbose=True):
     """Analyze water vapor transmittance for given conditions"""
@@ -34,30 +101,33 @@ def analyze_water_transmission(z_, pw_, p_, verbose=True):
     # Note: WaterTransmittance expects temperature, but we'll use a reasonable value
     tair = 15.0  # °C (to match MATLAB analysis)
     water_model = WaterTransmittance(z_, pw_, p_)
+    wavelengths = water_model.wvl_arr
     
     # Calculate transmittance
     trans = water_model.make_transmission()
     
     if verbose:
-        # Analyze results
-        min_trans = np.min(trans)
-        max_trans = np.max(trans)
-        mean_trans = np.mean(trans)
-        
-        min_idx = np.argmin(trans)
-        wavelengths = water_model.wvl_arr
-        
-        # Find absorption characteristics
-        very_strong_abs = np.sum(trans < 0.1)   # Nearly opaque
-        strong_abs = np.sum(trans < 0.5)        # Strong absorption
-        moderate_abs = np.sum(trans < 0.8)      # Moderate absorption
-        
-        print(f"  Range: [{min_trans:.6f}, {max_trans:.6f}]")
-        print(f"  Mean: {mean_trans:.6f}")
-        print(f"  Min at λ={wavelengths[min_idx]:.0f}nm: {min_trans:.6f}")
-        print(f"  Absorption points - Opaque: {very_strong_abs}, Strong: {strong_abs}, Moderate: {moderate_abs}")
+        print_water_summary(_summarize(np.ascontiguousarray(trans)), wavelengths)
+    
+    return trans, wavelengths
+
+def analyze_water_transmission_batch(z_, pw_values, p_, verbose=True):
+    """Analyze water vapor transmittance for several Pw values at once
+
+    Returns a (len(pw_values), n_wvl) transmission array and the wavelengths.
+    Pw enters the Bw, BMW and BP correction factors non-linearly inside
+    WaterTransmittance, so each row is still a separate model evaluation.
+    """
+    trans = None
+    for i, pw_ in enumerate(pw_values):
+        trans_pw, wavelengths = analyze_water_transmission(z_, pw_, p_, verbose=verbose)
+        if trans is None:
+            # float64 on purpose: the MATLAB comparison grades agreement down to 1e-14,
+            # far below float32 resolution (~6e-8 near T=1)
+            trans = np.empty((len(pw_values), len(trans_pw)), dtype=np.float64)
+        trans[i] = trans_pw
     
-    return trans, water_model.wvl_arr
+    return trans, wavelengths
 
 def find_water_absorption_bands(wavelengths, transmission, pw_value, threshold=0.5):
     """Find major water vapor absorption bands"""
@@ -66,38 +136,37 @@ def find_water_absorption_bands(wavelengths, transmission, pw_value, threshold=0
     
     strong_abs_mask = transmission < threshold
     
-    if np.sum(strong_abs_mask) == 0:
+    if not np.count_nonzero(strong_abs_mask):
         print(f"  No strong absorption bands found (all T > {threshold:.1f})")
         return
     
     abs_wavelengths = wavelengths[strong_abs_mask]
     abs_transmissions = transmission[strong_abs_mask]
     
-    # Group consecutive absorption regions
-    diff_wvl = np.diff(abs_wavelengths)
-    band_breaks = np.where(diff_wvl > 20)[0]  # More than 20nm gap
+    # A single absorbing point is one band on its own, no grouping needed
+    if abs_wavelengths.size == 1:
+        print(f"  Band 1: {abs_wavelengths[0]:.0f}-{abs_wavelengths[0]:.0f} nm, "
+              f"deepest T={abs_transmissions[0]:.3f} at {abs_wavelengths[0]:.0f} nm")
+        return
     
-    band_start = 0
-    band_count = 0
+    # Group consecutive absorption regions, split at gaps of more than 20nm
+    band_breaks = np.flatnonzero(np.diff(abs_wavelengths) > 20)
+    starts = np.concatenate(([0], band_breaks + 1))
+    ends = np.append(band_breaks + 1, len(abs_wavelengths))
+    band_id = np.repeat(np.arange(len(starts)), ends - starts)
     
-    for i in range(len(band_breaks) + 1):
-        if i < len(band_breaks):
-            band_end = band_breaks[i] + 1
-        else:
-            band_end = len(abs_wavelengths)
-        
-        if band_end > band_start:
-            band_count += 1
-            wvl_range = abs_wavelengths[band_start:band_end]
-            trans_range = abs_transmissions[band_start:band_end]
-            
-            min_idx = np.argmin(trans_range)
-            min_trans = trans_range[min_idx]
-            
-            print(f"  Band {band_count}: {np.min(wvl_range):.0f}-{np.max(wvl_range):.0f} nm, "
-                  f"deepest T={min_trans:.3f} at {wvl_range[min_idx]:.0f} nm")
-        
-        band_start = band_end
+    # Masking keeps the ascending order of the wavelength grid, so each band's
+    # extent is its first and last point; the deepest point of each band is
+    # the first entry of its block when sorted by (band, T)
+    wvl_min = abs_wavelengths[starts]
+    wvl_max = abs_wavelengths[ends - 1]
+    min_idx = np.lexsort((abs_transmissions, band_id))[starts]
+    
+    # One write for the whole band listing
+    sys.stdout.write(''.join(
+        f"  Band {band_count}: {lo:.0f}-{hi:.0f} nm, "
+        f"deepest T={abs_transmissions[idx]:.3f} at {abs_wavelengths[idx]:.0f} nm\n"
+        for band_count, (lo, hi, idx) in enumerate(zip(wvl_min, wvl_max, min_idx), start=1)))
 
 def main():
     """Main analysis function"""
@@ -120,20 +189,22 @@ def main():
     print(f"  Pressure: {p_test:.1f} hPa")
     print(f"  Water vapor amounts: {pw_values} cm")
     
-    # Test each water vapor amount
-    results = {}
-    wavelengths = None
+    # Test each water vapor amount; row i of results holds pw_values[i]
+    results, wavelengths = analyze_water_transmission_batch(
+        z_test, np.asarray(pw_values), p_test, verbose=False)
     
-    for pw in pw_values:
-        trans, wvl = analyze_water_transmission(z_test, pw, p_test, verbose=True)
-        results[pw] = trans
-        if wavelengths is None:
-            wavelengths = wvl
+    # Statistics computed once, shared by the per-Pw report and the summary table:
+    # range, mean and nearly opaque (<0.1) / strong (<0.5) / moderate (<0.8) counts
+    stats = [_summarize(trans) for trans in results]
+    for pw, pw_stats in zip(pw_values, stats):
+        print(f"\nAnalyzing water transmission: Pw={pw:.1f} cm, P={p_test:.1f} hPa, Z={z_test:.1f}°")
+        print_water_summary(pw_stats, wavelengths)
     
     # Analyze spectral features for a reference case
     pw_ref = 2.0  # cm
-    if pw_ref in results:
-        find_water_absorption_bands(wavelengths, results[pw_ref], pw_ref, threshold=0.5)
+    if pw_ref in pw_values:
+        find_water_absorption_bands(wavelengths, results[pw_values.index(pw_ref)], pw_ref,
+                                    threshold=0.5)
     
     # Show water vapor sensitivity analysis
     print(f"\n" + "="*50)
@@ -143,17 +214,10 @@ def main():
     print(f"\n{'Pw (cm)':<8} | {'Range':<15} | {'Mean':<10} | {'Opaque':<8} | {'Strong':<8} | {'Moderate':<10}")
     print("-" * 70)
     
-    for pw in pw_values:
-        trans = results[pw]
-        min_val, max_val = np.min(trans), np.max(trans)
-        mean_val = np.mean(trans)
-        
-        very_strong_abs = np.sum(trans < 0.1)   # Nearly opaque
-        strong_abs = np.sum(trans < 0.5)        # Strong absorption  
-        moderate_abs = np.sum(trans < 0.8)      # Moderate absorption
-        
-        print(f"{pw:<8.1f} | [{min_val:.3f},{max_val:.3f}] | {mean_val:<10.6f} | "
-              f"{very_strong_abs:<8} | {strong_abs:<8} | {moderate_abs:<10}")
+    sys.stdout.write(''.join(
+        _SUMMARY_ROW.format(pw=pw, min_val=min_val, max_val=max_val, mean_val=mean_val,
+                            opaque=opaque, strong=strong, moderate=moderate) + '\n'
+        for pw, (min_val, max_val, mean_val, _, opaque, strong, moderate) in zip(pw_values, stats)))
     
     # Save results for MATLAB comparison
     print(f"\nSaving results for MATLAB comparison...")
@@ -168,27 +232,23 @@ def main():
                 'temperature': tair_test,
                 'pressure': p_test,
                 'pw_values': np.array(pw_values)
-            }
+            },
+            # All Pw rows as one float64 matrix, row i for pw_values(i)
+            'pw_values': np.array(pw_values),
+            'transmission': results
         }
         
-        # Add transmission data for each water vapor amount
-        for pw in pw_values:
-            # Create valid MATLAB field name
-            field_name = f'pw_{pw:.1f}_transmission'.replace('.', '_')
-            save_data[field_name] = results[pw]
-        
-        savemat('python_water_results.mat', save_data)
+        # Default oned_as='row' keeps wavelengths a row vector like MATLAB's grid
+        savemat('python_water_results.mat', save_data, do_compression=True)
         print("✅ Results saved to python_water_results.mat")
         
     except ImportError:
-        print("⚠️  scipy not available, saving as text files")
+        print("⚠️  scipy not available, saving as a NumPy archive")
         
-        # Save as text files
-        np.savetxt('python_water_wavelengths.txt', wavelengths)
-        for pw in pw_values:
-            filename = f'python_water_pw{pw:.1f}_transmission.txt'
-            np.savetxt(filename, results[pw])
-        print("✅ Results saved as individual text files")
+        # Binary float64 arrays under the same names as the .mat fields
+        np.savez_compressed('python_water_results.npz', wavelengths=wavelengths,
+                            pw_values=np.array(pw_values), transmission=results)
+        print("✅ Results saved to python_water_results.npz")
     
     # Physical interpretation
     print(f"\n" + "="*50)
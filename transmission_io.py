@@ -0,0 +1,108 @@
+"""
+Shared I/O helpers for the MATLAB/Python transmission comparison scripts
+"""
+import os
+import tempfile
+import warnings
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+    # numba is optional, jitted kernels then run as plain Python
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+# Columns written by compare_matlab_python_transmission.py (and the MATLAB twin)
+RESULT_COLUMNS = ['Wavelength', 'Trans_Total', 'Trans_Ray', 'Trans_Oz',
+                  'Trans_Water', 'Trans_Aer', 'Trans_UMG']
+
+def parse_transmission_csv(path, wvl_range=(300, 1100), cols=(0, 1)):
+    """Parse the given columns of a results file, keeping rows whose
+    wavelength (column 0) lies within wvl_range; rows without exactly
+    7 fields or with a non-numeric value in cols are skipped"""
+    cols = tuple(cols)
+    if cols[0] != 0:
+        raise ValueError("cols must start with the wavelength column 0")
+    names = [RESULT_COLUMNS[c] for c in cols]
+    data = None
+    try:
+        import pyarrow as pa
+        import pyarrow.csv as pacsv
+        import pyarrow.compute as pc
+    except ImportError:
+        pa = None
+    if pa is not None:
+        # Only the requested columns are converted; header/summary lines without
+        # 7 fields are dropped by the parser, the '#' column header is filtered
+        tbl = pacsv.read_csv(
+            path,
+            read_options=pacsv.ReadOptions(column_names=RESULT_COLUMNS),
+            parse_options=pacsv.ParseOptions(delimiter=',',
+                                             invalid_row_handler=lambda row: 'skip'),
+            convert_options=pacsv.ConvertOptions(
+                include_columns=names,
+                column_types={name: pa.string() for name in names}))
+        tbl = tbl.filter(pc.invert(pc.starts_with(tbl['Wavelength'], '#')))
+        try:
+            data = np.column_stack([
+                pc.cast(pc.utf8_trim_whitespace(tbl[name]), pa.float64()).to_numpy()
+                for name in names])
+        except pa.ArrowInvalid:
+            # A non-numeric token; the genfromtxt path reads it as NaN
+            data = None
+    if data is None:
+        # Only 7-field lines reach the parser, header/summary lines never do;
+        # non-numeric values become NaN
+        with open(path) as f, warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            data = np.genfromtxt((line for line in f if line.count(',') == len(RESULT_COLUMNS) - 1),
+                                 delimiter=',', comments='#', dtype=np.float64, ndmin=2)
+        data = data.reshape(-1, len(RESULT_COLUMNS))[:, cols]
+    data = data[np.isfinite(data).all(axis=1)]
+    return data[(data[:, 0] >= wvl_range[0]) & (data[:, 0] <= wvl_range[1])]
+
+def load_transmission_csv(path, wvl_range=(300, 1100), cols=(0, 1)):
+    """Load parsed results, reusing a .npy cache newer than the source file"""
+    # v2: caches written before non-finite rows were dropped are not reused
+    cache = f"{path}.{'-'.join(map(str, cols))}_{wvl_range[0]:g}-{wvl_range[1]:g}.v2.npy"
+    if os.path.exists(cache) and os.path.getmtime(cache) >= os.path.getmtime(path):
+        return np.load(cache, mmap_mode='r')
+    data = parse_transmission_csv(path, wvl_range, cols)
+    # Write to a temporary file and rename it into place, so an interrupted or
+    # concurrent run never leaves a truncated cache that looks up to date
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=os.path.basename(cache) + '.', suffix='.npy',
+                                   dir=os.path.dirname(os.path.abspath(cache)))
+    except OSError:
+        return data  # read-only location, just skip caching
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp, cache)
+    except OSError:
+        pass
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return data
+
+def band_means(wavelengths, values, bands):
+    """Mean of values over inclusive [wvl_min, wvl_max] bands of a sorted
+    wavelength grid, from a single cumulative sum"""
+    lo = np.searchsorted(wavelengths, [wvl_min for _, wvl_min, _ in bands], side='left')
+    hi = np.searchsorted(wavelengths, [wvl_max for _, _, wvl_max in bands], side='right')
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    return (csum[hi] - csum[lo]) / (hi - lo)
+
+def quantize_transmissions(save_data):
+    """Store *_transmission arrays as uint16 *_transmission_q with a common
+    transmission_scale (max error 7.6e-6) to shrink the .mat file"""
+    quantized = {}
+    for name, value in save_data.items():
+        if name.endswith('_transmission'):
+            quantized[name + '_q'] = np.round(np.clip(value, 0.0, 1.0) * 65535.0).astype(np.uint16)
+        else:
+            quantized[name] = value
+    quantized['transmission_scale'] = 1.0 / 65535.0
+    return quantized
@@ -108,14 +108,12 @@ function run_full_comparison(python_data)
         Pw = Pw_values(i);
         
         % Get Python results
-        python_field = sprintf('pw_%.1f_transmission', Pw);
-        python_field = strrep(python_field, '.', '_');
+        python_trans = get_python_pw_transmission(python_data, Pw);
         
-        if ~isfield(python_data, python_field)
+        if isempty(python_trans)
             fprintf('%-8.1f | Missing Python data\n', Pw);
             continue;
         end
-        python_trans = python_data.(python_field);
         
         % Calculate MATLAB results
         matlab_trans = transmission.atmospheric.waterTransmissionOptimizedVectorized(...
@@ -255,15 +253,12 @@ function analyze_water_differences(python_data, Pw_values, Lam, H2O_data, Z_test
         Pw = Pw_values(i);
         
         % Get Python results
-        python_field = sprintf('pw_%.1f_transmission', Pw);
-        python_field = strrep(python_field, '.', '_');
+        python_trans = get_python_pw_transmission(python_data, Pw);
         
-        if ~isfield(python_data, python_field)
+        if isempty(python_trans)
             continue;
         end
         
-        python_trans = python_data.(python_field);
-        
         % Calculate MATLAB results
         matlab_trans = transmission.atmospheric.waterTransmissionOptimizedVectorized(...
             Z_test, Pw, P_test, Lam, 'H2OData', H2O_data);
@@ -300,4 +295,21 @@ function analyze_water_differences(python_data, Pw_values, Lam, H2O_data, Z_test
         fprintf('  Python min/mean: %.6f/%.6f\n', min(python_trans), mean(python_trans));
         fprintf('  MATLAB min/mean: %.6f/%.6f\n\n', min(matlab_trans), mean(matlab_trans));
     end
+end
+
+function trans = get_python_pw_transmission(python_data, Pw)
+    % Python transmission for water amount Pw: row of the transmission
+    % matrix (row i for pw_values(i)), or the per-Pw pw_X_Y_transmission
+    % field of result files written before the matrix; empty when missing
+    trans = [];
+    if isfield(python_data, 'pw_values') && isfield(python_data, 'transmission')
+        row = find(abs(python_data.pw_values - Pw) < 1e-9, 1);
+        if ~isempty(row)
+            trans = python_data.transmission(row, :);
+        end
+    end
+    if isempty(trans)
+        python_field = strrep(sprintf('pw_%.1f_transmission', Pw), '.', '_');
+        trans = get_python_transmission(python_data, python_field);
+    end
 end
\ No newline at end of file